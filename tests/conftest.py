@@ -7,6 +7,19 @@ from pathlib import Path
 
 import pytest
 
+import utilities
+from bilibili_client import VideoInfo
+
+
+@pytest.fixture(autouse=True)
+def clear_utility_caches():
+    """Reset process-wide caches in utilities so tests stay isolated."""
+    utilities.get_credentials_path.cache_clear()
+    utilities._credentials_cache.clear()
+    yield
+    utilities.get_credentials_path.cache_clear()
+    utilities._credentials_cache.clear()
+
 
 @pytest.fixture
 def mock_temp_dir():
@@ -62,6 +75,68 @@ def mock_video_info():
     }
 
 
+@pytest.fixture(scope="session")
+def mock_video_list():
+    """Three charging-free videos shared across the session (a tuple, so it can't be mutated)."""
+    return tuple(
+        VideoInfo(
+            bvid=f"bvid{i}",
+            title=f"Test Video {i}",
+            description="Test Description",
+            duration=100,
+            view_count=1000,
+            like_count=100,
+            coin_count=50,
+            favorite_count=30,
+            share_count=20,
+            upload_time="2023-01-01",
+            owner_name="Test User",
+            owner_mid=12345,
+            comment_count=10,
+            is_charging_exclusive=False,
+            charging_level="",
+        )
+        for i in range(1, 4)
+    )
+
+
+@pytest.fixture(scope="session")
+def mock_user_video_list():
+    """Two videos from the same uploader shared across the session."""
+    return (
+        VideoInfo(
+            bvid="BV1xx411c7mD",
+            title="Test Video 1",
+            description="Description 1",
+            duration=300,
+            view_count=1000,
+            like_count=100,
+            coin_count=50,
+            favorite_count=30,
+            share_count=20,
+            comment_count=10,
+            upload_time="2023-01-01 12:00:00",
+            owner_name="TestUser",
+            owner_mid=12345678,
+        ),
+        VideoInfo(
+            bvid="BV2xx411c7mD",
+            title="Test Video 2",
+            description="Description 2",
+            duration=250,
+            view_count=2000,
+            like_count=200,
+            coin_count=100,
+            favorite_count=60,
+            share_count=40,
+            comment_count=20,
+            upload_time="2023-01-02 12:00:00",
+            owner_name="TestUser",
+            owner_mid=12345678,
+        ),
+    )
+
+
 @pytest.fixture
 def mock_video_api_response():
     """Sample Bilibili API response for a video."""
@@ -241,15 +241,14 @@ class TestBilibiliClient:
         mock_client.get_user_videos.assert_called_once_with(12345678)
 
 
+@pytest.mark.xdist_group(name="env_mutation")
 class TestSimpleLLM:
     """Tests for SimpleLLM class."""
 
     def test_init_openai_default(self, mocker):
         """Test initializing with default OpenAI settings."""
-        # Clear all environment variables first to avoid influence from actual env
-        mocker.patch.dict(os.environ, {}, clear=True)
-        # Set only the API key we need
-        mocker.patch.dict(os.environ, {"LLM_API_KEY": "test_key"})
+        # Replace the whole environment so the real env can't leak in
+        mocker.patch.dict(os.environ, {"LLM_API_KEY": "test_key"}, clear=True)
         mock_openai = mocker.patch("openai.OpenAI")
 
         llm = SimpleLLM()
@@ -261,10 +260,10 @@ class TestSimpleLLM:
 
     def test_init_custom_model(self, mocker):
         """Test initializing with custom model."""
-        mocker.patch.dict(os.environ, {}, clear=True)
         mocker.patch.dict(
             os.environ,
             {"LLM_MODEL": "deepseek:deepseek-chat", "LLM_API_KEY": "test_key"},
+            clear=True,
         )
         mock_openai = mocker.patch("openai.OpenAI")
 
@@ -276,7 +275,6 @@ class TestSimpleLLM:
 
     def test_init_with_base_url(self, mocker):
         """Test initializing with base URL."""
-        mocker.patch.dict(os.environ, {}, clear=True)
         mocker.patch.dict(
             os.environ,
             {
@@ -284,6 +282,7 @@ class TestSimpleLLM:
                 "LLM_API_KEY": "test_key",
                 "LLM_BASE_URL": "https://api.example.com",
             },
+            clear=True,
         )
         mock_openai = mocker.patch("openai.OpenAI")
 
@@ -295,9 +294,10 @@ class TestSimpleLLM:
 
     def test_call_openai(self, mocker):
         """Test calling OpenAI API."""
-        mocker.patch.dict(os.environ, {}, clear=True)
         mocker.patch.dict(
-            os.environ, {"LLM_MODEL": "openai:gpt-4", "LLM_API_KEY": "test_key"}
+            os.environ,
+            {"LLM_MODEL": "openai:gpt-4", "LLM_API_KEY": "test_key"},
+            clear=True,
         )
         mock_openai = mocker.patch("openai.OpenAI")
 
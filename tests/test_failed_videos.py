@@ -1,41 +1,18 @@
 import asyncio
 import pytest
 
-from bilibili_client import BilibiliClient, VideoInfo, VideoTextContent
+from bilibili_client import BilibiliClient, VideoTextContent
 
 
 class TestFailedVideosTracking:
     """Test failed video tracking functionality"""
 
-    def setup_method(self):
-        # Create mock VideoInfo objects
-        self.mock_videos = [
-            VideoInfo(
-                bvid=f"bvid{i}",
-                title=f"Test Video {i}",
-                description="Test Description",
-                duration=100,
-                view_count=1000,
-                like_count=100,
-                coin_count=50,
-                favorite_count=30,
-                share_count=20,
-                upload_time="2023-01-01",
-                owner_name="Test User",
-                owner_mid=12345,
-                comment_count=10,
-                is_charging_exclusive=False,
-                charging_level="",
-            )
-            for i in range(1, 4)  # Create 3 videos
-        ]
-
     @pytest.mark.asyncio
-    async def test_failed_videos_tracking(self, mocker):
+    async def test_failed_videos_tracking(self, mocker, mock_video_list):
         """Test if videos are correctly tracked when processing fails"""
         # Configure mock return values
         mock_get_videos = mocker.patch("bilibili_client.BilibiliClient.get_user_videos")
-        mock_get_videos.return_value = self.mock_videos
+        mock_get_videos.return_value = mock_video_list
 
         # Mock video processing failure for the second video
         mock_get_content = mocker.patch(
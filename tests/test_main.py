@@ -6,7 +6,7 @@ import argparse
 
 import pytest
 
-from bilibili_client import VideoInfo
+from bilibili_client import BilibiliClient, VideoInfo
 from main import (
     load_credentials,
     format_duration,
@@ -15,7 +15,34 @@ from main import (
     main,
 )
 
+# Default CLI arguments shared by the main() tests
+_DEFAULT_ARGS = dict(
+    identifier="BV1xx411c7mD",
+    user=False,
+    text=False,
+    json=False,
+    content="subtitles,uploader",
+    output=None,
+    browser=None,
+    debug=False,
+    retry_llm=False,
+    export_user_subtitles=False,
+    subtitle_limit=None,
+    no_description=False,
+    no_meta_info=False,
+    force_login=False,
+    clear_credentials=False,
+    force_charging=False,
+    skip_charging=False,
+)
+
+
+def _args(**overrides):
+    """Build parsed CLI arguments from the defaults with the given overrides."""
+    return argparse.Namespace(**{**_DEFAULT_ARGS, **overrides})
 
+
+@pytest.mark.xdist_group(name="env_mutation")
 def test_load_credentials(mocker):
     """Test loading credentials from environment."""
     # Test with all credentials set
@@ -25,9 +52,8 @@ def test_load_credentials(mocker):
         "BILIBILI_BUVID3": "test_buvid3",
     }
 
-    # Mock environment
-    mocker.patch.dict(os.environ, {}, clear=True)  # Start with empty environment
-    mocker.patch.dict(os.environ, test_env)  # Then add only our test values
+    # Mock environment with only our test values
+    mocker.patch.dict(os.environ, test_env, clear=True)
 
     # Mock .env file loading
     mock_path = mocker.patch("pathlib.Path")
@@ -140,33 +166,11 @@ async def test_main_video_info(mocker, mock_video_info):
 
     # Mock command line arguments
     mock_parse_args = mocker.patch("argparse.ArgumentParser.parse_args")
-    mock_args = argparse.Namespace(
-        identifier="BV1xx411c7mD",
-        user=False,
-        text=False,
-        json=False,
-        content="subtitles,uploader",
-        output=None,
-        browser=None,
-        debug=False,
-        retry_llm=False,
-        export_user_subtitles=False,
-        subtitle_limit=None,
-        no_description=False,
-        no_meta_info=False,
-        force_login=False,
-        clear_credentials=False,
-        force_charging=False,
-        skip_charging=False,
-    )
-    mock_parse_args.return_value = mock_args
+    mock_parse_args.return_value = _args()
 
-    # Create a mock client class that won't create unawaited coroutines
-    mock_client = mocker.MagicMock()
-    # Make get_video_info an AsyncMock to properly handle awaiting
-    mock_client.get_video_info = mocker.AsyncMock(return_value=video)
-    # Ensure no other async methods are called that might create coroutines
-    mock_client.get_user_videos = mocker.AsyncMock()
+    # The spec turns every coroutine method into an AsyncMock
+    mock_client = mocker.AsyncMock(spec=BilibiliClient)
+    mock_client.get_video_info.return_value = video
 
     # Mock the BilibiliClient class to return our clean mock
     mocker.patch("main.BilibiliClient", return_value=mock_client)
@@ -183,69 +187,17 @@ async def test_main_video_info(mocker, mock_video_info):
 
 
 @pytest.mark.asyncio
-async def test_main_user_videos(mocker):
+async def test_main_user_videos(mocker, mock_user_video_list):
     """Test fetching user videos."""
-    # Create mock video list
-    mock_videos = [
-        VideoInfo(
-            bvid="BV1xx411c7mD",
-            title="Test Video 1",
-            description="Description 1",
-            duration=300,
-            view_count=1000,
-            like_count=100,
-            coin_count=50,
-            favorite_count=30,
-            share_count=20,
-            comment_count=10,
-            upload_time="2023-01-01 12:00:00",
-            owner_name="TestUser",
-            owner_mid=12345678,
-        ),
-        VideoInfo(
-            bvid="BV2xx411c7mD",
-            title="Test Video 2",
-            description="Description 2",
-            duration=250,
-            view_count=2000,
-            like_count=200,
-            coin_count=100,
-            favorite_count=60,
-            share_count=40,
-            comment_count=20,
-            upload_time="2023-01-02 12:00:00",
-            owner_name="TestUser",
-            owner_mid=12345678,
-        ),
-    ]
-
     # Mock command line arguments
     mock_parse_args = mocker.patch("argparse.ArgumentParser.parse_args")
-    mock_args = argparse.Namespace(
-        identifier="12345678",
-        user=True,  # Explicitly request user videos
-        text=False,
-        json=False,
-        content="subtitles,uploader",
-        output=None,
-        browser=None,
-        debug=False,
-        retry_llm=False,
-        export_user_subtitles=False,
-        subtitle_limit=None,
-        no_description=False,
-        no_meta_info=False,
-        force_login=False,
-        clear_credentials=False,
-        force_charging=False,
-        skip_charging=False,
+    mock_parse_args.return_value = _args(
+        identifier="12345678", user=True  # Explicitly request user videos
     )
-    mock_parse_args.return_value = mock_args
 
     # Create a complete mock for BilibiliClient that doesn't call any real code
-    mock_client = mocker.MagicMock()
-    # Use AsyncMock for the get_user_videos method
-    mock_client.get_user_videos = mocker.AsyncMock(return_value=mock_videos)
+    mock_client = mocker.AsyncMock(spec=BilibiliClient)
+    mock_client.get_user_videos.return_value = mock_user_video_list
 
     # Mock the BilibiliClient class to return our mock client
     mocker.patch("main.BilibiliClient", return_value=mock_client)
@@ -258,7 +210,7 @@ async def test_main_user_videos(mocker):
 
     # Verify user videos were fetched and displayed
     mock_client.get_user_videos.assert_called_once_with(12345678)
-    mock_display.assert_called_once_with(mock_videos)
+    mock_display.assert_called_once_with(mock_user_video_list)
 
 
 @pytest.mark.asyncio
@@ -269,34 +221,13 @@ async def test_main_video_text(mocker):
 
     # Mock command line arguments
     mock_parse_args = mocker.patch("argparse.ArgumentParser.parse_args")
-    mock_args = argparse.Namespace(
-        identifier="BV1xx411c7mD",
-        user=False,
-        text=True,  # Request text content
-        json=False,
-        content="subtitles,uploader",
-        output=None,
-        browser=None,
-        debug=False,
-        retry_llm=False,
-        export_user_subtitles=False,
-        subtitle_limit=None,
-        no_description=False,
-        no_meta_info=False,
-        force_login=False,
-        clear_credentials=False,
-        force_charging=False,
-        skip_charging=False,
-    )
-    mock_parse_args.return_value = mock_args
+    mock_parse_args.return_value = _args(text=True)  # Request text content
 
     # Mock client
-    mock_client = mocker.AsyncMock()
+    mock_client = mocker.AsyncMock(spec=BilibiliClient)
     mock_text_content = mocker.MagicMock()
     mock_text_content.to_markdown.return_value = mock_content
-    mock_client.get_video_text_content = mocker.AsyncMock(
-        return_value=mock_text_content
-    )
+    mock_client.get_video_text_content.return_value = mock_text_content
 
     mocker.patch("main.BilibiliClient", return_value=mock_client)
 
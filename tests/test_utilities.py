@@ -1,9 +1,19 @@
 """Unit tests for utilities.py module."""
 
+import os
+import re
+import sys
+import random
 import json
+import stat
 import time
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import pytest
+
+import utilities
 from utilities import (
     get_credentials_path,
     load_cached_credentials,
@@ -12,6 +22,9 @@ from utilities import (
     format_time_ago,
     remove_timestamps,
     format_subtitle_header,
+    download_with_ytdlp,
+    download_with_ytdlp_parallel,
+    get_browser_cookies,
 )
 
 
@@ -26,9 +39,12 @@ def test_get_credentials_path(mocker):
     mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
 
 
-def test_load_cached_credentials_no_file(mocker):
+def test_load_cached_credentials_no_file(mocker, mock_temp_dir):
     """Test loading credentials when file doesn't exist."""
-    mocker.patch("pathlib.Path.exists", return_value=False)
+    mocker.patch(
+        "utilities.get_credentials_path",
+        return_value=mock_temp_dir / "credentials.json",
+    )
     assert load_cached_credentials() == {}
     assert load_cached_credentials(browser="chrome") is None
 
@@ -47,28 +63,32 @@ def test_load_cached_credentials(mocker, mock_credentials_file, mock_credentials
     # Test loading specific browser credentials
     browser_creds = load_cached_credentials(browser="chrome")
     assert browser_creds == mock_credentials
+    assert load_cached_credentials(browser="chrome", include_timestamp=True) == (
+        mock_credentials,
+        1684000000,
+    )
 
     # Test browser not in credentials
     assert load_cached_credentials(browser="firefox") is None
 
 
-def test_load_cached_credentials_expired(mocker):
+def test_load_cached_credentials_expired(mocker, mock_temp_dir):
     """Test loading expired credentials."""
-    mock_path = mocker.patch("utilities.get_credentials_path")
-    mock_path.return_value = Path("credentials.json")
-    mocker.patch("pathlib.Path.exists", return_value=True)
-    mock_read = mocker.patch("pathlib.Path.read_text")
+    creds_path = mock_temp_dir / "credentials.json"
+    mocker.patch("utilities.get_credentials_path", return_value=creds_path)
 
     # Create credentials with timestamp from 31 days ago
     current_time = time.time()
     old_timestamp = current_time - (31 * 24 * 3600)
-    mock_read.return_value = json.dumps(
-        {
-            "chrome": {
-                "cookies": {"sessdata": "test"},
-                "timestamp": old_timestamp,
+    creds_path.write_text(
+        json.dumps(
+            {
+                "chrome": {
+                    "cookies": {"sessdata": "test"},
+                    "timestamp": old_timestamp,
+                }
             }
-        }
+        )
     )
 
     # Mock current time to be 31 days after the timestamp
@@ -78,13 +98,146 @@ def test_load_cached_credentials_expired(mocker):
     assert load_cached_credentials(browser="chrome") is None
 
 
+def test_load_cached_credentials_malformed(mocker, mock_temp_dir):
+    """Test loading credentials from a corrupt or unexpected file."""
+    creds_path = mock_temp_dir / "credentials.json"
+    mocker.patch("utilities.get_credentials_path", return_value=creds_path)
+
+    creds_path.write_text("{not json")
+    assert load_cached_credentials() == {}
+    assert load_cached_credentials(browser="chrome") is None
+
+    creds_path.write_text("[]")
+    assert load_cached_credentials(browser="chrome") is None
+
+    creds_path.write_text('{"chrome": "x"}')
+    assert save_credentials("chrome", {"SESSDATA": "test_sessdata"}) is True
+
+
+@pytest.mark.parametrize("timestamp", [None, "yesterday", [1], True])
+def test_load_cached_credentials_bad_timestamp(mocker, mock_temp_dir, timestamp):
+    """Test that a missing or non-numeric timestamp counts as expired."""
+    creds_path = mock_temp_dir / "credentials.json"
+    creds_path.write_text(
+        json.dumps({"chrome": {"cookies": {"SESSDATA": "x"}, "timestamp": timestamp}})
+    )
+    mocker.patch("utilities.get_credentials_path", return_value=creds_path)
+
+    assert load_cached_credentials(browser="chrome") is None
+    assert save_credentials("chrome", {"SESSDATA": "x"}) is True
+    assert load_cached_credentials(browser="chrome") == {"SESSDATA": "x"}
+
+
+@pytest.mark.parametrize("cookies", [["SESSDATA"], "SESSDATA=x", 1])
+def test_get_browser_cookies_bad_cached_cookies(mocker, mock_temp_dir, cookies):
+    """Test that a cached cookies value that isn't an object is re-extracted."""
+    creds_path = mock_temp_dir / "credentials.json"
+    creds_path.write_text(
+        json.dumps({"chrome": {"cookies": cookies, "timestamp": time.time()}})
+    )
+    mocker.patch("utilities.get_credentials_path", return_value=creds_path)
+    mocker.patch("utilities.rprint")
+    mock_extract = mocker.patch(
+        "utilities.get_bilibili_cookies", return_value={"SESSDATA": "fresh"}
+    )
+    mocker.patch.dict(utilities._cookie_file_cache, clear=True)
+
+    assert load_cached_credentials(browser="chrome") is None
+    cookie_file = get_browser_cookies("chrome")
+
+    mock_extract.assert_called_once_with("chrome")
+    assert "SESSDATA\tfresh" in Path(cookie_file).read_text()
+
+
+def test_load_cached_credentials_reuses_parsed_file(mocker, mock_credentials_file):
+    """Test that an unchanged credentials file is parsed only once."""
+    mocker.patch("utilities.get_credentials_path", return_value=mock_credentials_file)
+    mock_parse = mocker.spy(utilities, "_parse_credentials")
+
+    first = load_cached_credentials()
+    second = load_cached_credentials()
+
+    assert first == second
+    assert mock_parse.call_count == 1
+
+
+def test_load_cached_credentials_detects_same_mtime_replace(
+    mocker, mock_credentials_file
+):
+    """Test that a file replaced within one mtime tick is parsed again."""
+    mocker.patch("utilities.get_credentials_path", return_value=mock_credentials_file)
+    assert set(load_cached_credentials()) == {"chrome"}
+
+    # Same mtime as the cached file, as on a filesystem with coarse timestamps
+    mtime_ns = mock_credentials_file.stat().st_mtime_ns
+    replacement = mock_credentials_file.with_name("replacement.json")
+    replacement.write_text(json.dumps({"firefox": {"cookies": {}, "timestamp": 0}}))
+    os.utime(replacement, ns=(mtime_ns, mtime_ns))
+    os.replace(replacement, mock_credentials_file)
+
+    assert set(load_cached_credentials()) == {"firefox"}
+
+
+def test_save_credentials_leaves_loaded_dict_untouched(
+    mocker, mock_credentials_file, mock_credentials
+):
+    """Test that saving never mutates the dict shared with the parse cache."""
+    mocker.patch("utilities.get_credentials_path", return_value=mock_credentials_file)
+    loaded = load_cached_credentials()
+    snapshot = json.loads(json.dumps(loaded))
+
+    assert save_credentials("firefox", mock_credentials) is True
+
+    assert loaded == snapshot
+    assert set(load_cached_credentials()) == {"chrome", "firefox"}
+
+
+def test_check_credentials_uses_cached_browser(mocker, mock_credentials):
+    """Test that check_credentials picks the first browser with unexpired credentials."""
+    mocker.patch(
+        "utilities.load_cached_credentials",
+        return_value={
+            "chrome": {"cookies": mock_credentials, "timestamp": 0},
+            "firefox": {"cookies": mock_credentials, "timestamp": time.time()},
+        },
+    )
+    mocker.patch("utilities.rprint")
+    mock_input = mocker.patch("builtins.input")
+    args = mocker.Mock(
+        text=True, browser=None, force_login=False, clear_credentials=False
+    )
+
+    utilities.check_credentials(args)
+
+    assert args.browser == "firefox"
+    mock_input.assert_not_called()
+    utilities.load_cached_credentials.assert_called_once_with()
+
+
+@pytest.mark.parametrize("content", ["[]", "null", '{"chrome": "x"}'])
+def test_check_credentials_malformed_file(mocker, mock_temp_dir, content):
+    """Test that a credentials file of the wrong shape falls back to the browser prompt."""
+    creds_path = mock_temp_dir / "credentials.json"
+    creds_path.write_text(content)
+    mocker.patch("utilities.get_credentials_path", return_value=creds_path)
+    mocker.patch("utilities.rprint")
+    mock_input = mocker.patch("builtins.input", return_value="")
+    args = mocker.Mock(
+        text=True, browser=None, force_login=False, clear_credentials=False
+    )
+
+    utilities.check_credentials(args)
+
+    mock_input.assert_called_once()
+    assert args.browser is None
+
+
 def test_save_credentials(mocker, mock_temp_dir, mock_credentials):
     """Test saving credentials to file."""
     creds_path = mock_temp_dir / "test_creds.json"
 
     mocker.patch("utilities.get_credentials_path", return_value=creds_path)
     mocker.patch("utilities.load_cached_credentials", return_value={})
-    mock_chmod = mocker.patch("os.chmod")
 
     # Save credentials
     result = save_credentials("chrome", mock_credentials)
@@ -96,8 +249,158 @@ def test_save_credentials(mocker, mock_temp_dir, mock_credentials):
     assert saved_data["chrome"]["cookies"] == mock_credentials
     assert "timestamp" in saved_data["chrome"]
 
-    # Verify permissions were set
-    mock_chmod.assert_called_once_with(creds_path, 0o600)
+    # Verify the file is private to the user and no temp file is left behind
+    assert stat.S_IMODE(creds_path.stat().st_mode) == 0o600
+    assert os.listdir(mock_temp_dir) == ["test_creds.json"]
+
+
+def test_write_private_file_concurrent_writers(mock_temp_dir):
+    """Test that concurrent writers each replace the file with a complete payload."""
+    path = mock_temp_dir / "chrome.cookies"
+    payloads = [bytes([ord("a") + i]) * (1000 * (i + 1)) for i in range(4)]
+
+    def write(payload):
+        for _ in range(50):
+            utilities._write_private_file(path, payload)
+
+    with ThreadPoolExecutor(max_workers=len(payloads)) as executor:
+        list(executor.map(write, payloads))
+
+    assert path.read_bytes() in payloads
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert os.listdir(mock_temp_dir) == ["chrome.cookies"]
+
+
+def test_save_credentials_unchanged(mocker, mock_temp_dir, mock_credentials):
+    """Test that re-saving identical, recent credentials skips the write."""
+    creds_path = mock_temp_dir / "test_creds.json"
+    mocker.patch("utilities.get_credentials_path", return_value=creds_path)
+    mock_replace = mocker.spy(os, "replace")
+
+    assert save_credentials("chrome", mock_credentials) is True
+    assert save_credentials("chrome", mock_credentials) is True
+    assert mock_replace.call_count == 1
+
+    # Different cookies are written out
+    assert save_credentials("chrome", {**mock_credentials, "buvid3": "new"}) is True
+    assert mock_replace.call_count == 2
+
+
+def test_get_browser_cookies_persists_cookie_file(mocker, mock_temp_dir):
+    """Test that the cookie file is written once and reused across runs."""
+    creds_path = mock_temp_dir / "credentials.json"
+    creds_path.write_text(
+        json.dumps(
+            {
+                "chrome": {
+                    "cookies": {"SESSDATA": "test_sessdata", "bili_jct": "test_jct"},
+                    "timestamp": time.time() - 3600,
+                }
+            }
+        )
+    )
+    mocker.patch("utilities.get_credentials_path", return_value=creds_path)
+    mocker.patch("utilities.rprint")
+    mock_extract = mocker.patch("utilities.get_bilibili_cookies")
+    mocker.patch.dict(utilities._cookie_file_cache, clear=True)
+
+    cookie_file = get_browser_cookies("chrome")
+    assert cookie_file == str(mock_temp_dir / "chrome.cookies")
+    content = Path(cookie_file).read_text()
+    assert ".bilibili.com\tTRUE\t/\tTRUE\t0\tSESSDATA\ttest_sessdata" in content
+    assert stat.S_IMODE(Path(cookie_file).stat().st_mode) == 0o600
+
+    # A later run reuses the persisted file without touching the credentials
+    utilities._cookie_file_cache.clear()
+    creds_path.unlink()
+    assert get_browser_cookies("chrome") == cookie_file
+    mock_extract.assert_not_called()
+
+
+@pytest.mark.xdist_group(name="env_mutation")
+@pytest.mark.parametrize(
+    "env_value, extracts", [("1", True), ("0", False), ("", False)]
+)
+def test_get_browser_cookies_no_cookie_cache(
+    mocker, mock_temp_dir, env_value, extracts
+):
+    """Test that only BILIBILI_NO_COOKIE_CACHE=1 bypasses the cached cookie file."""
+    mocker.patch.dict(os.environ, {"BILIBILI_NO_COOKIE_CACHE": env_value})
+    mocker.patch(
+        "utilities.get_credentials_path",
+        return_value=mock_temp_dir / "credentials.json",
+    )
+    mocker.patch("utilities.rprint")
+    mock_extract = mocker.patch(
+        "utilities.get_bilibili_cookies", return_value={"SESSDATA": "fresh"}
+    )
+    cookie_file = mock_temp_dir / "chrome.cookies"
+    cookie_file.write_text("# Netscape HTTP Cookie File")
+    mocker.patch.dict(
+        utilities._cookie_file_cache,
+        {"chrome": (str(cookie_file), time.time())},
+        clear=True,
+    )
+
+    assert get_browser_cookies("chrome") == str(cookie_file)
+    assert mock_extract.called is extracts
+
+
+def test_cached_cookie_file_expires(mocker, mock_temp_dir):
+    """Test that expired or deleted in-memory cookie file entries are evicted."""
+    cookie_file = mock_temp_dir / "chrome.cookies"
+    cookie_file.write_text("# Netscape HTTP Cookie File")
+    mocker.patch.dict(
+        utilities._cookie_file_cache,
+        {
+            "chrome": (str(cookie_file), time.time()),
+            "firefox": (str(cookie_file), time.time() - 31 * 24 * 3600),
+            "edge": (str(mock_temp_dir / "missing.cookies"), time.time()),
+        },
+        clear=True,
+    )
+
+    now = time.time()
+    assert utilities._cached_cookie_file("chrome", now) == str(cookie_file)
+    assert utilities._cached_cookie_file("firefox", now) is None
+    assert utilities._cached_cookie_file("edge", now) is None
+    assert set(utilities._cookie_file_cache) == {"chrome"}
+
+
+@pytest.mark.xdist_group(name="env_mutation")
+def test_download_with_ytdlp_keeps_persisted_cookie_file(mocker, mock_temp_dir):
+    """Test that yt-dlp rewrites a per-run copy, never the persisted cookie file."""
+    mocker.patch.dict(os.environ)
+    os.environ.pop("YTDLP_USE_SUBPROCESS", None)
+    cookie_path = mock_temp_dir / "chrome.cookies"
+    cookie_path.write_bytes(b"# Netscape HTTP Cookie File\n")
+    extracted_at = time.time() - 3600
+    os.utime(cookie_path, (extracted_at, extracted_at))
+    mocker.patch("utilities.get_browser_cookies", return_value=str(cookie_path))
+    used_cookie_files = []
+
+    class FakeYoutubeDL:
+        def __init__(self, opts):
+            self.cookie_file = opts["cookiefile"]
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            # yt-dlp saves its cookie jar back to the cookie file on close
+            Path(self.cookie_file).write_bytes(b"rewritten by yt-dlp")
+
+        def download(self, urls):
+            used_cookie_files.append(self.cookie_file)
+
+    mocker.patch("yt_dlp.YoutubeDL", FakeYoutubeDL)
+
+    download_with_ytdlp("https://www.bilibili.com/video/BV1xx411c7mD", browser="chrome")
+
+    assert used_cookie_files and used_cookie_files[0] != str(cookie_path)
+    assert cookie_path.read_bytes() == b"# Netscape HTTP Cookie File\n"
+    assert cookie_path.stat().st_mtime == pytest.approx(extracted_at)
+    assert os.listdir(mock_temp_dir) == ["chrome.cookies"]
 
 
 def test_ensure_bilibili_url():
@@ -145,6 +448,9 @@ def test_format_time_ago():
     for timestamp, expected in test_cases:
         assert format_time_ago(timestamp) == expected
 
+    # An explicit reference time is used instead of the clock
+    assert format_time_ago(1000, now=1000 + 7200) == "2 hours ago"
+
 
 def test_remove_timestamps():
     """Test timestamp removal from subtitle text."""
@@ -166,6 +472,71 @@ def test_remove_timestamps():
     assert remove_timestamps(malformed) == expected_malformed
 
 
+def test_remove_timestamps_unicode_whitespace():
+    """Test that Unicode whitespace and digits count as \\s and \\d, as in re."""
+    text = (
+        "开始[1.23]\u3000你好\n[１.２３]\xa0全角\n[00:00.000 -->\u300000:02.880]\f字幕"
+    )
+    assert remove_timestamps(text) == "开始你好\n全角\n字幕"
+
+
+def test_re2_classes_match_re():
+    """Test that the classes spelled out for re2 match exactly what re's do."""
+    every_char = "".join(map(chr, range(sys.maxunicode + 1)))
+    for re_class, spelled in utilities._re2_classes().items():
+        assert re.findall(spelled, every_char) == re.findall(re_class, every_char)
+
+
+def test_timestamp_pattern_engines_agree():
+    """Test that google-re2, when installed, strips the same text as re."""
+    re2 = pytest.importorskip("re2")
+    text = "1\n00:00:01,000 --> 00:00:05,000\u3000\nA\n[١.٢] B\n[00:00.000 -->\xa000:02.880] C"
+    results = []
+    for engine in (re, re2):
+        result = text
+        for source in utilities._TIMESTAMP_SOURCES:
+            result = utilities._compile_pattern(source, engine).sub("", result)
+        results.append(result)
+    assert results[0] == results[1] == "A\nB\nC"
+
+
+def _remove_timestamps_multi_pass(text):
+    """The original remove_timestamps: one re.sub per format, in order."""
+    for pattern in (
+        r"\[\d{2}:\d{2}\.\d{3}\s*-->\s*\d{2}:\d{2}\.\d{3}\]\s*",
+        r"^\d+\s*\n\d{2}:\d{2}:\d{2},\d{3}\s*-->\s*\d{2}:\d{2}:\d{2},\d{3}\s*\n",
+        r"^\d{2}:\d{2}[:.]\d{3}\s*-->\s*\d{2}:\d{2}[:.]\d{3}\s*\n",
+        r"\[\d+\.\d+\]\s*",
+    ):
+        text = re.sub(pattern, "", text, flags=re.MULTILINE)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def test_remove_timestamps_matches_multi_pass():
+    """Test that mixed-format input is cleaned exactly as the sequential passes did."""
+    # A Whisper timestamp whose removal exposes an SRT block
+    mixed = "[00:00.000 --> 00:02.880] 1\n00:00:00,000 --> 00:00:02,880\n1\n你好"
+    assert remove_timestamps(mixed) == _remove_timestamps_multi_pass(mixed) == "1\n你好"
+
+    fragments = [
+        "[00:00.000 --> 00:02.880]",
+        "00:00:01,000 --> 00:00:05,000",
+        "00:01.000 --> 00:02.000",
+        "[1.23]",
+        "1",
+        "12",
+        "\n",
+        " ",
+        "\u3000",
+        "你好",
+        "[",
+    ]
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = "".join(rng.choices(fragments, k=rng.randint(1, 12)))
+        assert remove_timestamps(text) == _remove_timestamps_multi_pass(text), text
+
+
 def test_format_subtitle_header(mock_video_info):
     """Test subtitle header formatting."""
     # Test with all info included
@@ -193,3 +564,177 @@ def test_format_subtitle_header(mock_video_info):
     assert "This is a test video description" in result_no_meta
     assert "Views:" not in result_no_meta
     assert "Likes:" not in result_no_meta
+
+
+@pytest.mark.xdist_group(name="env_mutation")
+def test_download_with_ytdlp_batches_urls(mocker):
+    """Test that several URLs are fetched with a single yt-dlp invocation."""
+    mocker.patch.dict(os.environ, {"YTDLP_USE_SUBPROCESS": "1"})
+    mock_run = mocker.patch(
+        "utilities.subprocess.run",
+        return_value=subprocess.CompletedProcess([], 0, stderr=""),
+    )
+    urls = [
+        "https://www.bilibili.com/video/BV1xx411c7mD",
+        "https://www.bilibili.com/video/BV2xx411c7mD",
+    ]
+
+    download_with_ytdlp(urls, output_path="%(id)s.%(ext)s", download_type="audio")
+
+    mock_run.assert_called_once()
+    cmd = mock_run.call_args[0][0]
+    assert all(url in cmd for url in urls)
+    assert mock_run.call_args.kwargs["stdin"] == subprocess.DEVNULL
+    assert mock_run.call_args.kwargs["stderr"] == subprocess.PIPE
+
+
+@pytest.mark.xdist_group(name="env_mutation")
+@pytest.mark.parametrize("env_value", [None, "0", ""])
+def test_download_with_ytdlp_python_api(mocker, mock_temp_dir, env_value):
+    """Test that yt-dlp runs in-process with options matching the CLI flags."""
+    mocker.patch.dict(os.environ)
+    os.environ.pop("YTDLP_USE_SUBPROCESS", None)
+    if env_value is not None:
+        os.environ["YTDLP_USE_SUBPROCESS"] = env_value
+    cookie_path = mock_temp_dir / "chrome.cookies"
+    cookie_path.write_bytes(b"# Netscape HTTP Cookie File\n")
+    mocker.patch("utilities.get_browser_cookies", return_value=str(cookie_path))
+    mock_run = mocker.patch("utilities.subprocess.run")
+    mock_ydl_class = mocker.patch("yt_dlp.YoutubeDL")
+    ydl = mock_ydl_class.return_value.__enter__.return_value
+    urls = ["https://www.bilibili.com/video/BV1xx411c7mD"]
+
+    download_with_ytdlp(
+        urls, output_path="%(id)s.%(ext)s", download_type="all", browser="chrome"
+    )
+
+    mock_run.assert_not_called()
+    opts = mock_ydl_class.call_args[0][0]
+    assert opts["format"] == utilities._YTDLP_AUDIO_FORMAT
+    assert opts["outtmpl"] == "%(id)s.%(ext)s"
+    assert opts["writesubtitles"] and opts["subtitleslangs"] == ["all"]
+    assert "skip_download" not in opts
+    # -q hides the progress bar too, which the API needs spelled out
+    assert opts["quiet"] is True and opts["noprogress"] is True
+    # yt-dlp gets a per-run copy of the cookie file
+    assert opts["cookiefile"] != str(cookie_path)
+    assert Path(opts["cookiefile"]).parent == mock_temp_dir
+    ydl.download.assert_called_once_with(urls)
+
+    download_with_ytdlp(urls, download_type="subtitles")
+    opts = mock_ydl_class.call_args[0][0]
+    assert opts["skip_download"] is True
+    assert "format" not in opts and "cookiefile" not in opts
+
+
+def test_download_with_ytdlp_parallel(mocker):
+    """Test that parallel downloads run the CLI once per URL and collect failures."""
+    urls = [f"https://www.bilibili.com/video/BV{i}xx411c7mD" for i in range(3)]
+    mock_ydl_class = mocker.patch("yt_dlp.YoutubeDL")
+
+    def fake_run(cmd, **kwargs):
+        if urls[1] in cmd:
+            raise subprocess.CalledProcessError(1, cmd, stderr="ERROR: 404\n")
+        return subprocess.CompletedProcess(cmd, 0, stderr="")
+
+    mock_run = mocker.patch("utilities.subprocess.run", side_effect=fake_run)
+
+    with pytest.raises(ExceptionGroup) as exc_info:
+        download_with_ytdlp_parallel(urls, download_type="subtitles")
+
+    assert mock_run.call_count == len(urls)
+    assert len(exc_info.value.exceptions) == 1
+    mock_ydl_class.assert_not_called()
+
+
+@pytest.mark.xdist_group(name="env_mutation")
+def test_download_with_ytdlp_parallel_retries_rate_limited(
+    mocker, mock_temp_dir, capsys
+):
+    """Test that only HTTP 429 failures are retried, with exponential backoff."""
+    mock_sleep = mocker.patch("utilities.time.sleep")
+    cookie_path = mock_temp_dir / "chrome.cookies"
+    cookie_path.write_bytes(b"# Netscape HTTP Cookie File\n")
+    mock_cookies = mocker.patch(
+        "utilities.get_browser_cookies", return_value=str(cookie_path)
+    )
+    mocker.patch("utilities.rprint")
+    limited = "https://www.bilibili.com/video/BV1xx411c7mD"
+    broken = "https://www.bilibili.com/video/BV1429411c7m"
+    attempts = []
+
+    def fake_run(cmd, **kwargs):
+        # Each run gets its own copy of the cookie file
+        assert cmd[cmd.index("--cookies") + 1] != str(cookie_path)
+        url = limited if limited in cmd else broken
+        attempts.append(url)
+        if url == limited and attempts.count(url) <= 2:
+            stderr = "ERROR: [BiliBili] BV1xx411c7mD: HTTP Error 429: Too Many Requests"
+            raise subprocess.CalledProcessError(1, cmd, stderr=stderr)
+        if url == broken:
+            # A 429 inside the BVID alone is not a rate limit
+            stderr = "ERROR: [BiliBili] BV1429411c7m: Unable to download"
+            raise subprocess.CalledProcessError(1, cmd, stderr=stderr)
+        return subprocess.CompletedProcess(cmd, 0, stderr="")
+
+    mocker.patch("utilities.subprocess.run", side_effect=fake_run)
+
+    with pytest.raises(ExceptionGroup) as exc_info:
+        download_with_ytdlp_parallel([limited, broken], browser="chrome")
+
+    assert attempts.count(limited) == 3
+    assert attempts.count(broken) == 1
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [1, 2]
+    assert len(exc_info.value.exceptions) == 1
+    mock_cookies.assert_called_once_with("chrome")
+    # The collected stderr is still shown to the user
+    assert "HTTP Error 429" in capsys.readouterr().err
+
+
+def test_is_rate_limited():
+    """Test that a 429 is read from the yt-dlp error, never from the argv."""
+    from yt_dlp.utils import DownloadError, ExtractorError
+
+    class FakeHTTPError(Exception):
+        status = 429
+
+    try:
+        raise ExtractorError("Unable to download JSON metadata", cause=FakeHTTPError())
+    except ExtractorError as e:
+        wrapped = DownloadError(str(e), (type(e), e, None))
+
+    assert utilities._is_rate_limited(wrapped)
+    assert not utilities._is_rate_limited(DownloadError("ERROR: BV1429411c7m: 404"))
+    # CLI failures are judged by their stderr, never by the argv
+    cmd = ["yt-dlp", "https://www.bilibili.com/video/BV1429411c7m"]
+    assert not utilities._is_rate_limited(subprocess.CalledProcessError(1, cmd))
+    limited = subprocess.CalledProcessError(
+        1, cmd, stderr="ERROR: HTTP Error 429: Too Many Requests\n"
+    )
+    assert utilities._is_rate_limited(limited)
+
+
+def test_download_with_ytdlp_parallel_rejects_per_video_kwargs(mock_video_info):
+    """Test that per-video arguments can't be shared by concurrent downloads."""
+    urls = ["BV1xx411c7mD", "BV2xx411c7mD"]
+    with pytest.raises(ValueError):
+        download_with_ytdlp_parallel(urls, video_info=mock_video_info)
+    with pytest.raises(ValueError):
+        download_with_ytdlp_parallel(urls, output_path="audio.m4a")
+
+
+def test_verify_download_completeness(mocker, mock_temp_dir):
+    """Test that the media duration read by ffprobe is compared to the expected one."""
+    media = mock_temp_dir / "audio.m4a"
+    media.write_bytes(b"")
+    mock_run = mocker.patch("utilities.subprocess.run")
+
+    mock_run.return_value.stdout = "299.5\n"
+    assert utilities.verify_download_completeness(str(media), 300) is True
+    assert mock_run.call_args[0][0][0] == "ffprobe"
+
+    mock_run.return_value.stdout = "60.0\n"
+    assert utilities.verify_download_completeness(str(media), 300) is False
+
+    mock_run.side_effect = FileNotFoundError("ffprobe")
+    assert utilities.verify_download_completeness(str(media), 300) is False
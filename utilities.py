@@ -1,61 +1,302 @@
 import subprocess
 import os
+import functools
 import logging
 import re
-import tempfile
+import shlex
+import sys
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable
 
-from rich import print as rprint
-from rich.console import Console
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib json module is the fallback
+    orjson = None
 
-from extract_cookies import get_bilibili_cookies
+try:
+    import re2
+except ImportError:  # google-re2 is optional, the stdlib re module is the fallback
+    re2 = None
 
 
-# Global cache for cookie files to avoid extracting them multiple times
+# Cached credentials and cookie files expire after 30 days
+_EXPIRY_SECONDS = 30 * 24 * 3600
+# Global cache for cookie files to avoid extracting them multiple times,
+# keyed by browser and stored as (cookie_file, extracted_at)
 _cookie_file_cache = {}
+# Parsed credentials keyed by path, stored as ((st_mtime_ns, st_size, st_ino), creds)
+_credentials_cache = {}
+# Whether the deprecated credentials parameter warning was already shown
+_credentials_param_warned = False
 logger = logging.getLogger("bilibili_client")
 
 
+# rich, extract_cookies (which pulls in browsercookie) and yt_dlp are imported
+# at point of use so that helpers like remove_timestamps stay cheap to import.
+def rprint(*args, **kwargs):
+    """Print with rich markup, importing rich on first use"""
+    from rich import print as rich_print
+
+    rich_print(*args, **kwargs)
+
+
+def get_bilibili_cookies(browser):
+    """Extract Bilibili cookies from a browser, importing extract_cookies on first use"""
+    from extract_cookies import get_bilibili_cookies as extract_bilibili_cookies
+
+    return extract_bilibili_cookies(browser)
+
+
+def _use_ytdlp_subprocess() -> bool:
+    """Whether YTDLP_USE_SUBPROCESS asks for the yt-dlp CLI instead of its Python API"""
+    return os.environ.get("YTDLP_USE_SUBPROCESS") == "1"
+
+
+def _ytdlp_errors(use_subprocess: bool):
+    """Exception types raised by a failed yt-dlp download"""
+    if use_subprocess:
+        return (subprocess.CalledProcessError,)
+    from yt_dlp.utils import DownloadError
+
+    return (subprocess.CalledProcessError, DownloadError)
+
+
+@functools.lru_cache(maxsize=1)
+def _re2_classes() -> dict:
+    r"""Spell out re's \s and \d as the literal code point ranges they match.
+
+    re2's \s and \d only match ASCII, while re's match Unicode whitespace and
+    digits (e.g. U+3000), so re2 gets the characters listed instead.
+    """
+    # Every code point in order, so each run of matches is a contiguous range
+    every_char = "".join(map(chr, range(sys.maxunicode + 1)))
+    classes = {}
+    for re_class in (r"\s", r"\d"):
+        runs = (run.group() for run in re.finditer(f"{re_class}+", every_char))
+        spelled = "".join(
+            run if len(run) == 1 else f"{run[0]}-{run[-1]}" for run in runs
+        )
+        classes[re_class] = f"[{spelled}]"
+    return classes
+
+
+def _compile_pattern(pattern: str, engine=re2 or re):
+    r"""Compile a pattern so \s and \d match the same text under re and re2."""
+    if engine is re:
+        return re.compile(pattern)
+    for re_class, spelled in _re2_classes().items():
+        pattern = pattern.replace(re_class, spelled)
+    return engine.compile(pattern)
+
+
+# Patterns to match various subtitle formats, applied in this order. They stay
+# separate passes because a fused alternation matches in a different order on
+# mixed-format input. google-re2 runs them as linear-time DFAs when installed.
+_TIMESTAMP_SOURCES = (
+    # Whisper style [00:00.000 --> 00:02.880]
+    r"\[\d{2}:\d{2}\.\d{3}\s*-->\s*\d{2}:\d{2}\.\d{3}\]\s*",
+    # SRT style timestamps (with line numbers)
+    r"(?m)^\d+\s*\n\d{2}:\d{2}:\d{2},\d{3}\s*-->\s*\d{2}:\d{2}:\d{2},\d{3}\s*\n",
+    # VTT style timestamps
+    r"(?m)^\d{2}:\d{2}[:.]\d{3}\s*-->\s*\d{2}:\d{2}[:.]\d{3}\s*\n",
+    # Bilibili API style timestamps with from/to
+    r"\[\d+\.\d+\]\s*",
+)
+_TIMESTAMP_PATTERNS = tuple(map(_compile_pattern, _TIMESTAMP_SOURCES))
+_MULTIPLE_NEWLINES = re.compile(r"\n{3,}")
+
+# Netscape cookie file layout used for yt-dlp, with the cookies it needs
+_NETSCAPE_HEADER = (
+    b"# Netscape HTTP Cookie File\n"
+    b"# https://curl.se/docs/http-cookies.html\n"
+    b"# This file was generated by Bilibili analyzer. Edit at your own risk.\n"
+)
+_NETSCAPE_COOKIE_NAMES = ("SESSDATA", "bili_jct", "buvid3")
+
+# yt-dlp flag sets shared by every download.
+# Using 'bestaudio' instead of 'ba' which is more flexible, with fallback
+# formats in case 'bestaudio' is not available
+_YTDLP_AUDIO_FORMAT = "bestaudio/audio/16/32/64/80"
+_YTDLP_AUDIO_FLAGS = ("-f", _YTDLP_AUDIO_FORMAT)
+_YTDLP_SUBTITLE_FLAGS = ("--write-subs", "--write-auto-subs", "--sub-langs", "all")
+
+# Meta info lines in subtitle headers as (template, attribute, default)
+_HEADER_META_FIELDS = (
+    ("BVID: {}", "bvid", ""),
+    ("Upload Time: {}", "upload_time", ""),
+    ("Views: {:,}", "view_count", 0),
+    ("Coins: {:,}", "coin_count", 0),
+    ("Likes: {:,}", "like_count", 0),
+    ("Favorites: {:,}", "favorite_count", 0),
+    ("Shares: {:,}", "share_count", 0),
+)
+
+
+def _parse_credentials(data: bytes) -> dict:
+    """Parse credentials file contents, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _serialize_credentials(creds: dict) -> bytes:
+    """Serialize credentials compactly for storage, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(creds)
+    return json.dumps(creds, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _private_temp_file(path: Path, data: bytes, sync: bool = False) -> str:
+    """Write data to a new temp file next to path, readable/writable only by user."""
+    # Imported here so runs that never write a file don't pay for it
+    import tempfile
+
+    # A unique sibling per writer, so concurrent writers never share (and
+    # truncate) the same inode; mkstemp already creates it with mode 0o600
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view) :]
+            if sync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    return tmp_path
+
+
+def _write_private_file(path: Path, data: bytes):
+    """Atomically replace path with data, readable/writable only by user."""
+    # Flush to disk before the rename so a crash can't leave an empty file
+    tmp_path = _private_temp_file(path, data, sync=True)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+@functools.lru_cache(maxsize=1)
 def get_credentials_path():
-    """Returns path for credentials storage"""
+    """Returns path for credentials storage (computed and created once per process)"""
     home = Path.home()
     config_dir = home / ".config" / "bilibili_analyzer"
     config_dir.mkdir(parents=True, exist_ok=True)
     return config_dir / "credentials.json"
 
 
-def load_cached_credentials(browser=None):
+def get_cookie_file_path(browser: str) -> Path:
+    """Returns path of the persisted Netscape cookie file for a browser"""
+    return get_credentials_path().with_name(f"{browser}.cookies")
+
+
+def _format_netscape_cookies(cookies: dict) -> bytes:
+    """Format the Bilibili cookies yt-dlp needs as a Netscape cookie file"""
+    lines = [_NETSCAPE_HEADER]
+    for name in _NETSCAPE_COOKIE_NAMES:
+        value = cookies.get(name)
+        if value:
+            line = f".bilibili.com\tTRUE\t/\tTRUE\t0\t{name}\t{value}"
+            lines.append(line.encode("utf-8"))
+    return b"\n".join(lines)
+
+
+def _save_cookie_file(browser: str, cookies: dict, timestamp: float) -> str:
+    """Persist cookies as a Netscape cookie file next to the credentials.
+
+    The file's mtime is set to when the cookies were extracted, so its age
+    matches the credentials it was generated from. yt-dlp rewrites its cookie
+    file on close, so downloads only ever get a copy (see _ytdlp_cookie_copy)
+    and this file keeps its contents and mtime.
+    """
+    cookie_path = get_cookie_file_path(browser)
+    _write_private_file(cookie_path, _format_netscape_cookies(cookies))
+    os.utime(cookie_path, (timestamp, timestamp))
+    return str(cookie_path)
+
+
+def _ytdlp_cookie_copy(cookie_file: str) -> str:
+    """Copy a cookie file for a single yt-dlp run, which may freely rewrite it"""
+    cookie_path = Path(cookie_file)
+    return _private_temp_file(cookie_path, cookie_path.read_bytes())
+
+
+def _cached_cookie_file(browser: str, now: float) -> str | None:
+    """Return the in-memory cached cookie file, evicting it once expired or deleted"""
+    entry = _cookie_file_cache.get(browser)
+    if entry is None:
+        return None
+    cookie_file, extracted_at = entry
+    if now - extracted_at > _EXPIRY_SECONDS or not os.path.exists(cookie_file):
+        _cookie_file_cache.pop(browser, None)
+        return None
+    return cookie_file
+
+
+def _unexpired_cookies(browser_creds, now: float):
+    """Return (cookies, timestamp) from a browser's credentials entry, or None if missing or expired"""
+    if not isinstance(browser_creds, dict):
+        return None
+    # Check if expired (default 30 days); a missing or non-numeric timestamp is too
+    timestamp = browser_creds.get("timestamp", 0)
+    if not isinstance(timestamp, (int, float)) or isinstance(timestamp, bool):
+        return None
+    if (now - timestamp) > _EXPIRY_SECONDS:
+        return None
+    cookies = browser_creds.get("cookies")
+    return (cookies, timestamp) if cookies and isinstance(cookies, dict) else None
+
+
+def load_cached_credentials(browser=None, include_timestamp=False):
     """Load cached credentials
 
     Args:
         browser: Specific browser to load credentials for
+        include_timestamp: With a browser, return (cookies, timestamp) instead of cookies
 
     Returns:
         Browser credentials dict if browser specified, all credentials if not,
-        or None/empty dict if no credentials found
+        or None/empty dict if no credentials found. The dicts are shared with
+        the parse cache, so treat them as read-only.
     """
     cred_path = get_credentials_path()
-    if not cred_path.exists():
+    try:
+        st = cred_path.stat()
+    except FileNotFoundError:
         return None if browser else {}
+    # mtime alone misses a rewrite within one coarse timestamp tick, while
+    # os.replace always brings a new inode
+    file_key = (st.st_mtime_ns, st.st_size, st.st_ino)
 
     try:
-        creds = json.loads(cred_path.read_text())
+        # Reuse the parsed file unless it has changed on disk
+        cached = _credentials_cache.get(cred_path)
+        if cached and cached[0] == file_key:
+            creds = cached[1]
+        else:
+            creds = _parse_credentials(cred_path.read_bytes())
+            if not isinstance(creds, dict):
+                # Valid JSON of the wrong shape holds no usable credentials
+                creds = {}
+            _credentials_cache[cred_path] = (file_key, creds)
         if browser:
             # Check if credentials exist for this browser and not expired
-            browser_creds = creds.get(browser)
-            if not browser_creds:
-                return None
-
-            # Check if expired (default 30 days)
-            timestamp = browser_creds.get("timestamp", 0)
-            if (time.time() - timestamp) > 30 * 24 * 3600:
-                return None
-
-            return browser_creds.get("cookies")
+            cached = _unexpired_cookies(creds.get(browser), time.time())
+            if include_timestamp or not cached:
+                return cached
+            return cached[0]
         return creds
-    except:
+    except (OSError, ValueError):
+        # Unreadable or malformed file (JSON decode errors are ValueErrors)
         return None if browser else {}
 
 
@@ -70,12 +311,19 @@ def save_credentials(browser, cookies):
         bool: Whether saving was successful
     """
     creds = load_cached_credentials() or {}
-    creds[browser] = {"cookies": cookies, "timestamp": time.time()}
+    now = time.time()
+
+    # Re-saving the same cookies within a day only churns the file, so keep it
+    existing = _unexpired_cookies(creds.get(browser), now)
+    if existing and existing[0] == cookies and now - existing[1] < 24 * 3600:
+        return True
+
+    # Merge into a new dict, the loaded one belongs to the parse cache
+    creds = {**creds, browser: {"cookies": cookies, "timestamp": now}}
 
     cred_path = get_credentials_path()
     try:
-        cred_path.write_text(json.dumps(creds, indent=2))
-        os.chmod(cred_path, 0o600)  # Make readable/writable only by user
+        _write_private_file(cred_path, _serialize_credentials(creds))
         return True
     except Exception as e:
         logger.warning(f"Failed to save credentials: {e}")
@@ -84,28 +332,36 @@ def save_credentials(browser, cookies):
 
 def ensure_bilibili_url(identifier: str) -> str:
     """If identifier is a BVID, assemble the full Bilibili video URL."""
-    if (identifier.startswith("BV") or identifier.startswith("bv")) and len(
-        identifier
-    ) >= 12:
+    # Full URLs are passed through untouched
+    if "://" in identifier:
+        return identifier
+    if identifier.startswith(("BV", "bv")) and len(identifier) >= 12:
         return f"https://www.bilibili.com/video/{identifier}"
     return identifier
 
 
-def format_time_ago(timestamp: float) -> str:
-    """Return a human-readable string like '5 days ago' for a given timestamp (seconds since epoch)."""
-    now = time.time()
+# Units used by format_time_ago, largest first, as (seconds, name)
+_TIME_UNITS = ((86400, "day"), (3600, "hour"), (60, "minute"))
+
+
+@functools.lru_cache(maxsize=256)
+def _format_elapsed(count: int, unit: str) -> str:
+    """Render an elapsed-time bucket such as '5 days ago'."""
+    return f"{count} {unit}{'s' if count != 1 else ''} ago"
+
+
+def format_time_ago(timestamp: float, now: float = None) -> str:
+    """Return a human-readable string like '5 days ago' for a given timestamp (seconds since epoch).
+
+    Pass ``now`` to reuse one reference time across many calls; it defaults to the current time.
+    """
+    if now is None:
+        now = time.time()
     diff = int(now - timestamp)
-    if diff < 60:
-        return f"{diff} seconds ago"
-    elif diff < 3600:
-        minutes = diff // 60
-        return f"{minutes} minute{'s' if minutes != 1 else ''} ago"
-    elif diff < 86400:
-        hours = diff // 3600
-        return f"{hours} hour{'s' if hours != 1 else ''} ago"
-    else:
-        days = diff // 86400
-        return f"{days} day{'s' if days != 1 else ''} ago"
+    for seconds, unit in _TIME_UNITS:
+        if diff >= seconds:
+            return _format_elapsed(diff // seconds, unit)
+    return _format_elapsed(diff, "second")
 
 
 def get_browser_cookies(browser: str, force_refresh=False) -> str:
@@ -117,69 +373,57 @@ def get_browser_cookies(browser: str, force_refresh=False) -> str:
 
     Returns:
         Path to the cookie file
+
+    The cookie file is extracted once and reused by every later yt-dlp call.
+    Set BILIBILI_NO_COOKIE_CACHE=1 to extract fresh cookies on every call.
     """
     global _cookie_file_cache
 
+    if os.environ.get("BILIBILI_NO_COOKIE_CACHE") == "1":
+        force_refresh = True
+
     # If force refresh is requested, clear any existing cache entries
     if force_refresh and browser in _cookie_file_cache:
         logger.debug(f"Force refresh requested for {browser}, clearing cache")
         _cookie_file_cache.pop(browser, None)
 
-    # If cookie file already exists in in-memory cache, return it
-    if (
-        browser in _cookie_file_cache
-        and os.path.exists(_cookie_file_cache[browser])
-        and not force_refresh
-    ):
-        return _cookie_file_cache[browser]
+    # One reference time for every expiry check and age message below
+    now = time.time()
+
+    # If a fresh cookie file exists in the in-memory cache, return it
+    if not force_refresh and (cookie_file := _cached_cookie_file(browser, now)):
+        return cookie_file
 
     # Check disk cache if not forcing refresh
     if not force_refresh:
-        cred_path = get_credentials_path()
-        if cred_path.exists():
+        # A cookie file persisted by an earlier run can be used as-is
+        cookie_path = get_cookie_file_path(browser)
+        try:
+            extracted_at = cookie_path.stat().st_mtime
+        except FileNotFoundError:
+            extracted_at = None
+        if extracted_at and (now - extracted_at) <= _EXPIRY_SECONDS:
+            _cookie_file_cache[browser] = (str(cookie_path), extracted_at)
+            age_str = format_time_ago(extracted_at, now)
+            rprint(
+                f"[green]Using cached Bilibili credentials ({age_str}) from {browser}.[/green]"
+            )
+            return str(cookie_path)
+
+        cached = load_cached_credentials(browser, include_timestamp=True)
+        if cached:
+            cookies, timestamp = cached
             try:
-                creds = json.loads(cred_path.read_text())
-                browser_creds = creds.get(browser)
-                if browser_creds:
-                    cookies = browser_creds.get("cookies")
-                    timestamp = browser_creds.get("timestamp", 0)
-                    if cookies and (time.time() - timestamp) <= 30 * 24 * 3600:
-                        # Create temporary cookie file
-                        cookie_file = tempfile.NamedTemporaryFile(
-                            delete=False, suffix=".cookies", mode="w"
-                        )
-                        # Format cookies in Netscape format
-                        cookie_lines = [
-                            "# Netscape HTTP Cookie File",
-                            "# https://curl.se/docs/http-cookies.html",
-                            "# This file was generated from cached credentials.",
-                            "",
-                        ]
-                        domain = ".bilibili.com"
-                        for name, value in cookies.items():
-                            if value:
-                                if name == "SESSDATA":
-                                    cookie_lines.append(
-                                        f"{domain}\tTRUE\t/\tTRUE\t0\tSESSDATA\t{value}"
-                                    )
-                                elif name == "bili_jct":
-                                    cookie_lines.append(
-                                        f"{domain}\tTRUE\t/\tTRUE\t0\tbili_jct\t{value}"
-                                    )
-                                elif name == "buvid3":
-                                    cookie_lines.append(
-                                        f"{domain}\tTRUE\t/\tTRUE\t0\tbuvid3\t{value}"
-                                    )
-                        cookie_file.write("\n".join(cookie_lines))
-                        cookie_file.close()
-                        _cookie_file_cache[browser] = cookie_file.name
-                        age_str = format_time_ago(timestamp)
-                        rprint(
-                            f"[green]Using cached Bilibili credentials ({age_str}) from {browser}.[/green]"
-                        )
-                        return cookie_file.name
-            except Exception:
-                pass
+                cookie_file = _save_cookie_file(browser, cookies, timestamp)
+                _cookie_file_cache[browser] = (cookie_file, timestamp)
+                age_str = format_time_ago(timestamp, now)
+                rprint(
+                    f"[green]Using cached Bilibili credentials ({age_str}) from {browser}.[/green]"
+                )
+                return cookie_file
+            except OSError as e:
+                # Fall back to extracting fresh cookies from the browser
+                logger.debug(f"Could not reuse cached credentials for {browser}: {e}")
 
     # Extract new cookies from browser - this is always executed when force_refresh is true
     rprint(
@@ -193,39 +437,18 @@ def get_browser_cookies(browser: str, force_refresh=False) -> str:
         )
         return None
 
-    # Create temporary cookie file
-    cookie_file = tempfile.NamedTemporaryFile(delete=False, suffix=".cookies", mode="w")
-
-    # Format cookies in Netscape format
-    cookie_content = [
-        "# Netscape HTTP Cookie File",
-        "# https://curl.se/docs/http-cookies.html",
-        "# This file was generated by Bilibili analyzer. Edit at your own risk.",
-        "",
-    ]
-
-    # Add cookies in the required format
-    domain = ".bilibili.com"
-    for name, value in cookies.items():
-        if name == "SESSDATA" and value:
-            cookie_content.append(f"{domain}\tTRUE\t/\tTRUE\t0\tSESSDATA\t{value}")
-        elif name == "bili_jct" and value:
-            cookie_content.append(f"{domain}\tTRUE\t/\tTRUE\t0\tbili_jct\t{value}")
-        elif name == "buvid3" and value:
-            cookie_content.append(f"{domain}\tTRUE\t/\tTRUE\t0\tbuvid3\t{value}")
-
-    # Write cookies to file
-    cookie_file.write("\n".join(cookie_content))
-    cookie_file.close()
+    # Write cookies to the persisted cookie file in Netscape format
+    extracted_at = time.time()
+    cookie_file = _save_cookie_file(browser, cookies, extracted_at)
 
     # Cache the cookie file path for future use
-    _cookie_file_cache[browser] = cookie_file.name
+    _cookie_file_cache[browser] = (cookie_file, extracted_at)
 
     # Save credentials to persistent cache
     save_credentials(browser, cookies)
 
     rprint(f"[green]Bilibili cookies extracted and saved for reuse.[/green]")
-    return cookie_file.name
+    return cookie_file
 
 
 def check_credentials(args):
@@ -235,32 +458,37 @@ def check_credentials(args):
         args: Command line arguments
     """
     # Handle credential clearing if requested
-    if hasattr(args, "clear_credentials") and args.clear_credentials:
+    if getattr(args, "clear_credentials", False):
         cred_path = get_credentials_path()
-        if cred_path.exists():
+        # Cookie files are generated from the credentials, so they go too
+        for browser in ["chrome", "firefox"]:
+            get_cookie_file_path(browser).unlink(missing_ok=True)
+            _cookie_file_cache.pop(browser, None)
+        try:
             cred_path.unlink()
-            rprint("[green]Credentials successfully cleared.[/green]")
-        else:
+        except FileNotFoundError:
             rprint("[yellow]No stored credentials found.[/yellow]")
+        else:
+            rprint("[green]Credentials successfully cleared.[/green]")
         return
 
     # Check if operation needs authentication
     needs_auth = (
-        hasattr(args, "text")
-        and args.text
-        or hasattr(args, "retry_llm")
-        and args.retry_llm
-        or hasattr(args, "export_user_subtitles")
-        and args.export_user_subtitles
+        getattr(args, "text", False)
+        or getattr(args, "retry_llm", False)
+        or getattr(args, "export_user_subtitles", False)
     )
 
-    force_refresh = hasattr(args, "force_login") and args.force_login
+    force_refresh = getattr(args, "force_login", False)
 
     if needs_auth and not args.browser:
         # Check if we have cached credentials for any browser (only if not forcing refresh)
         if not force_refresh:
+            # Load the credentials file once and check each browser in memory
+            all_creds = load_cached_credentials()
+            now = time.time()
             for browser in ["chrome", "firefox"]:
-                if load_cached_credentials(browser):
+                if _unexpired_cookies(all_creds.get(browser), now):
                     rprint(
                         f"[green]Found valid cached credentials from {browser}.[/green]"
                     )
@@ -288,7 +516,7 @@ def check_credentials(args):
 
 
 def download_with_ytdlp(
-    url: str,
+    url: str | Iterable[str],
     output_path: str = None,
     download_type: str = "audio",
     credentials=None,  # Keeping parameter for backward compatibility
@@ -296,20 +524,34 @@ def download_with_ytdlp(
     video_info=None,  # VideoInfo object for detecting charging content
     force_charging=False,  # Force download attempt for charging videos
     skip_charging=False,  # Skip charging videos entirely
+    cookie_file=None,  # Cookie file already resolved for browser ("" if none)
+    use_subprocess=None,  # Run the yt-dlp CLI; None follows YTDLP_USE_SUBPROCESS
 ):
     """Download media from a Bilibili video using yt-dlp.
 
     Args:
-        url: Bilibili video URL
-        output_path: Output path (optional)
-        download_type: 'audio', 'subtitles', or 'all'
+        url: Bilibili video URL, or several URLs to fetch in a single yt-dlp run
+        output_path: Output path or template (optional, use a template such as
+            "%(id)s.%(ext)s" when downloading several URLs)
+        download_type: 'audio', 'subtitles', or 'all' to fetch both in one yt-dlp run
         credentials: Deprecated, use browser parameter instead
         browser: Browser to extract cookies from (e.g., 'chrome', 'firefox')
         video_info: VideoInfo object for detecting charging content
         force_charging: Force download attempt for charging videos
         skip_charging: Skip charging videos entirely
+        cookie_file: Cookie file already resolved for browser, skips the lookup
+            ("" when the browser had no cookies)
+        use_subprocess: Run the yt-dlp CLI instead of its Python API, defaults
+            to the YTDLP_USE_SUBPROCESS setting
+
+    yt-dlp is driven through its Python API to avoid spawning a new process
+    per download. Set YTDLP_USE_SUBPROCESS=1 to run the yt-dlp CLI instead.
+    The API options mirror the CLI flags, but not every CLI default: the CLI
+    runs with ignoreerrors="only_download" and keeps going after a failed URL,
+    while the API raises DownloadError on the first failure. Its playlist-only
+    defaults (extract_flat, FFmpegConcat) don't apply to single video URLs.
     """
-    console = Console()
+    global _credentials_param_warned
 
     # Check if video is charging exclusive content - OUTSIDE any progress/status indicators
     if video_info and video_info.is_charging_exclusive:
@@ -338,30 +580,39 @@ def download_with_ytdlp(
                 print("Download cancelled.")
                 return
 
+    # yt-dlp runs in-process by default; the CLI is kept as a fallback
+    if use_subprocess is None:
+        use_subprocess = _use_ytdlp_subprocess()
     cmd = ["yt-dlp"]
+    opts = {}
 
     # Skip actual video/audio download if only subtitles are requested
     if download_type == "subtitles":
         cmd.append("--skip-download")
+        opts["skip_download"] = True
 
     # Add format specification based on download type
     if download_type in ["audio", "all"]:
-        # Using 'bestaudio' instead of 'ba' which is more flexible
-        # Also add fallback formats in case 'bestaudio' is not available
-        cmd.extend(["-f", "bestaudio/audio/16/32/64/80"])
+        cmd.extend(_YTDLP_AUDIO_FLAGS)
+        opts["format"] = _YTDLP_AUDIO_FORMAT
 
     # Add subtitles option if requested
     if download_type in ["subtitles", "all"]:
-        cmd.extend(["--write-subs", "--write-auto-subs", "--sub-langs", "all"])
+        cmd.extend(_YTDLP_SUBTITLE_FLAGS)
+        opts.update(writesubtitles=True, writeautomaticsub=True, subtitleslangs=["all"])
 
     # Handle authentication - use cached cookie file for browser
-    cookie_file = None
+    run_cookie_file = None
     if browser:
         # Extract cookies first, before showing any download messages
         # Get cookie file from cache, extracting it only once if needed
-        cookie_file = get_browser_cookies(browser)
+        if cookie_file is None:
+            cookie_file = get_browser_cookies(browser)
         if cookie_file:
-            cmd.extend(["--cookies", cookie_file])
+            # yt-dlp saves the jar back on exit, so keep the shared file intact
+            run_cookie_file = _ytdlp_cookie_copy(cookie_file)
+            cmd.extend(["--cookies", run_cookie_file])
+            opts["cookiefile"] = run_cookie_file
             logger.debug(
                 f"Using cached cookies from {browser} browser for authentication"
             )
@@ -369,33 +620,66 @@ def download_with_ytdlp(
             rprint(
                 f"[yellow]Warning: No cookies found for {browser}. Download may fail if authentication is required.[/yellow]"
             )
-    elif credentials:
-        # Legacy warning
+    elif credentials and not _credentials_param_warned:
+        # Legacy warning, shown once per process
         rprint(
             "[yellow]Warning: The credentials parameter is deprecated, please use --browser instead[/yellow]"
         )
+        _credentials_param_warned = True
 
-    # Add URL and output template if specified
-    cmd.append(url)
+    # Add URLs and output template if specified
+    urls = [url] if isinstance(url, str) else list(url)
+    cmd.extend(urls)
     if output_path:
         cmd.extend(["-o", output_path])
+        opts["outtmpl"] = output_path
 
     # Add quiet flag to reduce output when not in debug mode
-    if logger.isEnabledFor(logging.DEBUG):
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
         cmd.append("-v")
+        opts["verbose"] = True
         # Show command in debug mode only
-        logger.debug(f"Running yt-dlp command: {' '.join(cmd)}")
+        if use_subprocess:
+            logger.debug("Running yt-dlp command: %s", shlex.join(cmd))
+        else:
+            logger.debug("Running yt-dlp with options: %s", opts)
     else:
-        # Add quiet flag to reduce output when not in debug mode
+        # Add quiet flag to reduce output when not in debug mode; the CLI's -q
+        # also hides the progress bar, which the API only does with noprogress
         cmd.append("-q")
+        opts.update(quiet=True, noprogress=True)
 
     # Create status message based on download type
     status_message = f"Downloading {download_type}..."
 
-    # Run the command with status indicator
+    # Run the download with status indicator
     try:
         print(f"\n{status_message}")
-        subprocess.run(cmd, check=True)
+        if use_subprocess:
+            # yt-dlp never reads stdin; outside debug mode its stdout is
+            # discarded too, and stderr is collected so errors can be inspected
+            # and then printed whole instead of interleaving with other runs
+            try:
+                completed = subprocess.run(
+                    cmd,
+                    check=True,
+                    stdin=subprocess.DEVNULL,
+                    stdout=None if debug else subprocess.DEVNULL,
+                    stderr=None if debug else subprocess.PIPE,
+                    text=True,
+                )
+            except subprocess.CalledProcessError as e:
+                if e.stderr:
+                    sys.stderr.write(e.stderr)
+                raise
+            if completed.stderr:
+                sys.stderr.write(completed.stderr)
+        else:
+            from yt_dlp import YoutubeDL
+
+            with YoutubeDL(opts) as ydl:
+                ydl.download(urls)
         print(f"{download_type.capitalize()} download complete.")
 
         # Verify download completeness for charging videos
@@ -413,7 +697,7 @@ def download_with_ytdlp(
                     print(
                         f"Warning: Downloaded content is incomplete ({video_info.title}). Only preview content is available without payment."
                     )
-    except subprocess.CalledProcessError as e:
+    except _ytdlp_errors(use_subprocess) as e:
         # Provide more context in error messages to help debugging
         if download_type == "subtitles" and not browser:
             print(
@@ -423,9 +707,93 @@ def download_with_ytdlp(
             print(
                 f"yt-dlp audio download failed. You might need authentication with --browser."
             )
-        else:
+        elif isinstance(e, subprocess.CalledProcessError):
             print(f"yt-dlp download failed with error code {e.returncode}")
+        else:
+            print(f"yt-dlp download failed: {e}")
         raise
+    finally:
+        if run_cookie_file:
+            Path(run_cookie_file).unlink(missing_ok=True)
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """Whether a yt-dlp failure was caused by an HTTP 429 from Bilibili.
+
+    CLI failures are judged by the stderr download_with_ytdlp collects (never
+    the argv, which holds the URL); in debug mode stderr goes straight to the
+    terminal and such failures are never treated as rate limited.
+    """
+    if isinstance(error, subprocess.CalledProcessError):
+        return "HTTP Error 429" in (error.stderr or "")
+    # DownloadError keeps the ExtractorError in exc_info, which wraps the HTTPError
+    cause = (getattr(error, "exc_info", None) or (None, None, None))[1]
+    while cause is not None:
+        if getattr(cause, "status", None) == 429 or getattr(cause, "code", None) == 429:
+            return True
+        cause = getattr(cause, "cause", None)
+    return "HTTP Error 429" in str(error)
+
+
+def download_with_ytdlp_parallel(
+    urls: Iterable[str], concurrency: int = 4, max_retries: int = 3, **kwargs
+):
+    """Download several Bilibili videos with concurrent yt-dlp runs.
+
+    Downloads are network bound, so a small thread pool is enough to overlap
+    them. Each worker runs the yt-dlp CLI in its own process, so no YoutubeDL
+    instance is shared between threads and each run's stderr is printed whole.
+    Rate-limited (HTTP 429) downloads are retried with exponential backoff.
+
+    Args:
+        urls: Bilibili video URLs
+        concurrency: Maximum number of downloads running at once
+        max_retries: Retries per URL after a rate-limit error
+        **kwargs: Passed to download_with_ytdlp for every URL. video_info is
+            per-video and not accepted, and output_path must be a template
+            such as "%(id)s.%(ext)s" so every URL gets its own file.
+
+    Raises:
+        ValueError: If video_info or a non-template output_path is passed
+        ExceptionGroup: With one yt-dlp error per failed URL
+    """
+    if kwargs.get("video_info") is not None:
+        raise ValueError("video_info describes a single video, download it alone")
+    output_path = kwargs.get("output_path")
+    if output_path and "%(" not in output_path:
+        raise ValueError(
+            f"output_path must be a yt-dlp template such as '%(id)s.%(ext)s', got {output_path!r}"
+        )
+
+    urls = list(urls)
+    if not urls:
+        return
+
+    # Resolve cookies once up front; the workers only copy the resulting file
+    # and never extract or write cookies themselves
+    if kwargs.get("browser") and kwargs.get("cookie_file") is None:
+        kwargs["cookie_file"] = get_browser_cookies(kwargs["browser"]) or ""
+
+    kwargs["use_subprocess"] = True
+    download_errors = _ytdlp_errors(True)
+
+    def download(url):
+        for attempt in range(max_retries + 1):
+            try:
+                download_with_ytdlp(url, **kwargs)
+                return None
+            except download_errors as e:
+                if attempt == max_retries or not _is_rate_limited(e):
+                    return e
+                delay = 2**attempt
+                logger.debug(f"Rate limited on {url}, retrying in {delay}s")
+                time.sleep(delay)
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(urls))) as executor:
+        errors = [error for error in executor.map(download, urls) if error]
+
+    if errors:
+        raise ExceptionGroup(f"{len(errors)} of {len(urls)} downloads failed", errors)
 
 
 def remove_timestamps(subtitle_text: str) -> str:
@@ -442,25 +810,18 @@ def remove_timestamps(subtitle_text: str) -> str:
     Returns:
         Cleaned subtitle text with timestamps removed
     """
-    # Different patterns to match various subtitle formats
-    patterns = [
-        # Whisper style [00:00.000 --> 00:02.880]
-        r"\[\d{2}:\d{2}\.\d{3}\s*-->\s*\d{2}:\d{2}\.\d{3}\]\s*",
-        # SRT style timestamps (with line numbers)
-        r"^\d+\s*\n\d{2}:\d{2}:\d{2},\d{3}\s*-->\s*\d{2}:\d{2}:\d{2},\d{3}\s*\n",
-        # VTT style timestamps
-        r"^\d{2}:\d{2}[:.]\d{3}\s*-->\s*\d{2}:\d{2}[:.]\d{3}\s*\n",
-        # Bilibili API style timestamps with from/to
-        r"\[\d+\.\d+\]\s*",
-    ]
-
-    # Apply each pattern
     result = subtitle_text
-    for pattern in patterns:
-        result = re.sub(pattern, "", result, flags=re.MULTILINE)
+    # Every supported timestamp contains "-->" or "[", so clean text skips the regex
+    if "-->" not in result and "[" not in result:
+        if "\n\n\n" in result:
+            result = _MULTIPLE_NEWLINES.sub("\n\n", result)
+        return result.strip()
+
+    for pattern in _TIMESTAMP_PATTERNS:
+        result = pattern.sub("", result)
 
     # Clean up multiple newlines
-    result = re.sub(r"\n{3,}", "\n\n", result)
+    result = _MULTIPLE_NEWLINES.sub("\n\n", result)
 
     return result.strip()
 
@@ -485,8 +846,18 @@ def verify_download_completeness(
         return False
 
     try:
-        # Use yt-dlp to get duration information
-        cmd = ["yt-dlp", "--skip-download", "--print", "duration", filepath]
+        # Read the duration from the container header with ffprobe (shipped
+        # with ffmpeg), rather than starting a whole yt-dlp process
+        cmd = [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            filepath,
+        ]
         result = subprocess.run(cmd, capture_output=True, text=True, check=True)
 
         # Parse duration
@@ -502,7 +873,7 @@ def verify_download_completeness(
             return False
 
         return True
-    except (subprocess.CalledProcessError, ValueError) as e:
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
         logger.debug(f"Error verifying download completeness: {str(e)}")
         return False
 
@@ -522,47 +893,30 @@ def format_subtitle_header(
     """
     header = []
 
-    # Get values, ensuring they are proper for formatting
-    def get_value(attr_name, default=""):
-        if hasattr(video_info, attr_name):
-            return getattr(video_info, attr_name)
-        elif isinstance(video_info, dict) and attr_name in video_info:
-            return video_info[attr_name]
-        return default
+    # Resolve the lookup once for dicts (raw API data) vs VideoInfo objects
+    if isinstance(video_info, dict):
+        get_value = video_info.get
+    else:
+
+        def get_value(attr_name, default=""):
+            return getattr(video_info, attr_name, default)
 
     # Always include the title with # prefix
     title = get_value("title", get_value("bvid", ""))
     header.append(f"# {title}")
 
     if include_meta_info:
-        # Get comment count
-        comment_count = 0
-        if (
-            hasattr(video_info, "comment_count")
-            and video_info.comment_count is not None
-        ):
-            comment_count = video_info.comment_count
-        elif isinstance(video_info, dict) and "comment_count" in video_info:
-            comment_count = video_info["comment_count"]
-        elif (
-            isinstance(video_info, dict)
-            and "stat" in video_info
-            and "reply" in video_info["stat"]
-        ):
-            comment_count = video_info["stat"]["reply"]
+        # Get comment count, falling back to the raw API's stat.reply
+        comment_count = get_value("comment_count", None)
+        if comment_count is None:
+            stats = video_info.get("stat") if isinstance(video_info, dict) else None
+            comment_count = stats.get("reply", 0) if stats else 0
 
         header.extend(
-            [
-                f"BVID: {get_value('bvid')}",
-                f"Upload Time: {get_value('upload_time')}",
-                f"Views: {get_value('view_count', 0):,}",
-                f"Coins: {get_value('coin_count', 0):,}",
-                f"Likes: {get_value('like_count', 0):,}",
-                f"Favorites: {get_value('favorite_count', 0):,}",
-                f"Shares: {get_value('share_count', 0):,}",
-                f"Comments: {comment_count:,}",
-            ]
+            template.format(get_value(attr_name, default))
+            for template, attr_name, default in _HEADER_META_FIELDS
         )
+        header.append(f"Comments: {comment_count:,}")
 
     if include_description:
         # Get description
@@ -570,9 +924,7 @@ def format_subtitle_header(
         if description:
             # Add a separator line
             header.append("\nDescription:")
-            # Indent description lines
-            description_lines = description.split("\n")
-            for line in description_lines:
-                header.append(f"> {line}")
+            # Indent description lines, quoting the whole block in one pass
+            header.append("> " + description.replace("\n", "\n> "))
 
     return "\n".join(header)